@@ -14,11 +14,9 @@ private:
     Engine engine;
     
 public:
-    BenchmarkSuite() : rng(std::random_device{}()) {
-        // Create a comprehensive rule set for benchmarking
-        rules = createBenchmarkRules();
-        engine = Engine(rules);
-    }
+    // Create a comprehensive rule set for benchmarking
+    BenchmarkSuite()
+        : rng(std::random_device{}()), rules(createBenchmarkRules()), engine(rules) {}
     
     std::vector<Rule> createBenchmarkRules() {
         std::vector<Rule> benchmarkRules;
@@ -3,6 +3,7 @@
 #include <string>
 #include <map>
 #include <chrono>
+#include <iomanip>
 #include "../include/engine.hpp"
 #include "../include/types.hpp"
 
@@ -19,11 +20,8 @@ private:
     std::map<std::string, std::string> patientData;
     
 public:
-    MedicalDiagnosisSystem() {
-        // Create medical diagnosis rules
-        std::vector<Rule> medicalRules = createMedicalRules();
-        engine = Engine(medicalRules);
-    }
+    // Create medical diagnosis rules
+    MedicalDiagnosisSystem() : engine(createMedicalRules()) {}
     
     std::vector<Rule> createMedicalRules() {
         std::vector<Rule> rules;
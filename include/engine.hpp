@@ -2,14 +2,76 @@
 #include "types.hpp"
 #include <vector>
 #include <unordered_map>
+#include <string>
+#include <mutex>
+#include <cstdint>
 
 class Engine {
 private:
     std::vector<Rule> rules;
-
+    
+    // Rule patterns compiled to interned term IDs, stored column-wise (one
+    // entry per rule, or per argument in the flattened arg arrays) so the
+    // match loop compares integers instead of strings. The original rules
+    // above are kept for the literal consequent strings.
+    struct CompiledRules {
+        static constexpr uint32_t unknownTerm = UINT32_MAX;
+        
+        std::unordered_map<std::string, uint32_t> termIds;
+        
+        struct TermKeyHash {
+            std::size_t operator()(const std::vector<uint32_t>& key) const;
+        };
+        
+        // Rules of one predicate with the same arity and literal positions and
+        // no repeated variables. Such a rule matches exactly when the query's
+        // terms at those positions equal its literals, so matching is a
+        // single hash lookup for the whole group.
+        struct RuleShape {
+            uint32_t arity;
+            std::vector<uint32_t> literalPositions;
+            std::unordered_map<std::vector<uint32_t>, std::vector<size_t>, TermKeyHash> rulesByLiterals;
+        };
+        struct PredicateRules {
+            std::vector<RuleShape> shapes;
+            std::vector<size_t> general;   // rules with repeated variables, checked with matchCompiled
+        };
+        std::vector<PredicateRules> rulesByPredicate;   // indexed by predicate term ID
+        
+        std::vector<uint32_t> argOffset;      // rule i owns args [argOffset[i], argOffset[i + 1])
+        std::vector<uint32_t> argTerm;        // literal term ID, unused for variables
+        std::vector<int32_t> argFirstSeen;    // -1 for literals, else position the variable first appears at
+        
+        std::vector<uint32_t> consOffset;     // rule i owns consequent args [consOffset[i], consOffset[i + 1])
+        std::vector<int32_t> consFromArg;     // pattern position supplying a bound variable, -1 to keep the literal
+        
+        uint32_t intern(const std::string& term);
+        uint32_t lookup(const std::string& term) const;
+    };
+    CompiledRules compiled;
+    
+    // Memoized infer() results; rules are fixed after construction so entries never go stale
+    static constexpr size_t maxCacheEntries = 4096;
+    std::unordered_map<Pattern, std::vector<std::pair<Consequent, float>>, PatternHash> inferCache;
+    // Guards inferCache so infer() can be called from several threads at once
+    mutable std::mutex cacheMutex;
+    
 public:
     Engine(const std::vector<Rule>& rules);
+    Engine(const Engine& other);
+    Engine(Engine&& other);
+    Engine& operator=(const Engine& other);
+    Engine& operator=(Engine&& other);
     std::vector<std::pair<Consequent, float>> infer(const Pattern& query);
+    std::vector<std::vector<std::pair<Consequent, float>>> inferBatch(const std::vector<Pattern>& queries);
     std::vector<std::pair<Consequent, float>> inferContext(const std::vector<Pattern>& facts);
     std::vector<std::pair<Consequent, float>> inferMultiLayer(const std::vector<Pattern>& initialFacts, size_t maxLayers);
-};
\ No newline at end of file
+    std::vector<std::pair<Consequent, float>> inferMultiLayerSemiNaive(const std::vector<Pattern>& initialFacts, size_t maxLayers);
+    void clearCache();
+    
+private:
+    std::vector<size_t> matchingRules(const Pattern& query, const std::vector<uint32_t>& queryIds) const;
+    std::vector<uint32_t> queryTermIds(const Pattern& query) const;
+    bool matchCompiled(size_t ruleIndex, const Pattern& query, const std::vector<uint32_t>& queryIds) const;
+    Consequent substituteCompiled(size_t ruleIndex, const Pattern& query) const;
+};
@@ -61,6 +61,23 @@ struct ConsequentHash {
     }
 };
 
+// Hash function for Pattern to use in unordered_map
+struct PatternHash {
+    std::size_t operator()(const Pattern& p) const {
+        return (*this)(p.predicate, p.args);
+    }
+    
+    // Hash a predicate and its arguments without building a Pattern
+    std::size_t operator()(const std::string& predicate, const std::vector<std::string>& args) const {
+        std::size_t h1 = std::hash<std::string>{}(predicate);
+        std::size_t h2 = 0;
+        for (const auto& arg : args) {
+            h2 ^= std::hash<std::string>{}(arg) + 0x9e3779b9 + (h2 << 6) + (h2 >> 2);
+        }
+        return h1 ^ (h2 << 1);
+    }
+};
+
 // Utility functions for pattern matching and substitution
 std::pair<float, std::unordered_map<std::string, std::string>> matchScore(
     const Pattern& query, const Pattern& pattern);
@@ -71,3 +88,17 @@ Consequent substitute(const Consequent& consequent,
 // JSON parsing utilities
 std::vector<Rule> loadRulesFromJSON(const std::string& filename);
 void saveRulesToJSON(const std::vector<Rule>& rules, const std::string& filename);
+
+// In-memory variants of the above, using the same JSON rule format
+std::vector<Rule> parseRulesFromJSON(const std::string& content);
+std::string dumpRulesToJSON(const std::vector<Rule>& rules);
+
+// Conversion between patterns and their "(predicate arg ...)" string form
+Pattern parsePattern(const std::string& patternStr);
+Consequent parseConsequent(const std::string& consequentStr);
+std::string patternToString(const Pattern& pattern);
+std::string consequentToString(const Consequent& consequent);
+
+// Format a predicate and its arguments without building a Pattern or Consequent
+std::string patternToString(const std::string& predicate, const std::vector<std::string>& args);
+std::string consequentToString(const std::string& predicate, const std::vector<std::string>& args);
@@ -1,11 +1,13 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/numpy.h>
+#include <pybind11/operators.h>
 #include "../include/engine.hpp"
 #include "../include/types.hpp"
 #include "../include/attention.hpp"
 #include <vector>
 #include <string>
+#include <tuple>
 
 namespace py = pybind11;
 
@@ -22,6 +24,10 @@ public:
         return Pattern(predicate, args);
     }
     
+    bool operator==(const PyPattern& other) const {
+        return predicate == other.predicate && args == other.args;
+    }
+    
     static PyPattern fromPattern(const Pattern& pattern) {
         return PyPattern(pattern.predicate, pattern.args);
     }
@@ -35,6 +41,9 @@ public:
     PyConsequent(const std::string& pred, const std::vector<std::string>& arguments)
         : predicate(pred), args(arguments) {}
     
+    PyConsequent(std::string&& pred, std::vector<std::string>&& arguments)
+        : predicate(std::move(pred)), args(std::move(arguments)) {}
+    
     Consequent toConsequent() const {
         return Consequent(predicate, args);
     }
@@ -42,6 +51,11 @@ public:
     static PyConsequent fromConsequent(const Consequent& consequent) {
         return PyConsequent(consequent.predicate, consequent.args);
     }
+    
+    // Inference results are temporaries, so their strings can be moved rather than copied
+    static PyConsequent fromConsequent(Consequent&& consequent) {
+        return PyConsequent(std::move(consequent.predicate), std::move(consequent.args));
+    }
 };
 
 class PyRule {
@@ -64,25 +78,63 @@ public:
     }
 };
 
+std::vector<Rule> toCppRules(const std::vector<PyRule>& rules) {
+    std::vector<Rule> cppRules;
+    cppRules.reserve(rules.size());
+    for (const auto& rule : rules) {
+        cppRules.push_back(rule.toRule());
+    }
+    return cppRules;
+}
+
 class PyEngine {
 private:
     Engine engine;
     
 public:
-    PyEngine(const std::vector<PyRule>& rules) {
-        std::vector<Rule> cppRules;
-        for (const auto& rule : rules) {
-            cppRules.push_back(rule.toRule());
-        }
-        engine = Engine(cppRules);
-    }
+    PyEngine(const std::vector<PyRule>& rules) : engine(toCppRules(rules)) {}
     
     std::vector<std::pair<PyConsequent, float>> infer(const PyPattern& query) {
-        auto results = engine.infer(query.toPattern());
+        // query refers to the Python-owned object, so copy it out before
+        // releasing the GIL; another thread could be assigning its args
+        Pattern cppQuery = query.toPattern();
+        std::vector<std::pair<Consequent, float>> results;
+        {
+            py::gil_scoped_release release;
+            results = engine.infer(cppQuery);
+        }
         std::vector<std::pair<PyConsequent, float>> pyResults;
+        pyResults.reserve(results.size());
         
-        for (const auto& [consequent, weight] : results) {
-            pyResults.emplace_back(PyConsequent::fromConsequent(consequent), weight);
+        for (auto& [consequent, weight] : results) {
+            pyResults.emplace_back(PyConsequent::fromConsequent(std::move(consequent)), weight);
+        }
+        
+        return pyResults;
+    }
+    
+    void clearCache() {
+        engine.clearCache();
+    }
+    
+    std::vector<std::vector<std::pair<PyConsequent, float>>> inferBatch(const std::vector<PyPattern>& queries) {
+        std::vector<Pattern> cppQueries;
+        cppQueries.reserve(queries.size());
+        for (const auto& query : queries) {
+            cppQueries.push_back(query.toPattern());
+        }
+        
+        auto batchResults = engine.inferBatch(cppQueries);
+        std::vector<std::vector<std::pair<PyConsequent, float>>> pyResults;
+        pyResults.reserve(batchResults.size());
+        
+        for (auto& results : batchResults) {
+            std::vector<std::pair<PyConsequent, float>> pyQueryResults;
+            pyQueryResults.reserve(results.size());
+            for (auto& [consequent, weight] : results) {
+                pyQueryResults.emplace_back(PyConsequent::fromConsequent(std::move(consequent)), weight);
+            }
+            pyResults.push_back(std::move(pyQueryResults));
         }
         
         return pyResults;
@@ -90,15 +142,17 @@ public:
     
     std::vector<std::pair<PyConsequent, float>> inferContext(const std::vector<PyPattern>& facts) {
         std::vector<Pattern> cppFacts;
+        cppFacts.reserve(facts.size());
         for (const auto& fact : facts) {
             cppFacts.push_back(fact.toPattern());
         }
         
         auto results = engine.inferContext(cppFacts);
         std::vector<std::pair<PyConsequent, float>> pyResults;
+        pyResults.reserve(results.size());
         
-        for (const auto& [consequent, weight] : results) {
-            pyResults.emplace_back(PyConsequent::fromConsequent(consequent), weight);
+        for (auto& [consequent, weight] : results) {
+            pyResults.emplace_back(PyConsequent::fromConsequent(std::move(consequent)), weight);
         }
         
         return pyResults;
@@ -106,15 +160,35 @@ public:
     
     std::vector<std::pair<PyConsequent, float>> inferMultiLayer(const std::vector<PyPattern>& initialFacts, size_t maxLayers) {
         std::vector<Pattern> cppFacts;
+        cppFacts.reserve(initialFacts.size());
         for (const auto& fact : initialFacts) {
             cppFacts.push_back(fact.toPattern());
         }
         
         auto results = engine.inferMultiLayer(cppFacts, maxLayers);
         std::vector<std::pair<PyConsequent, float>> pyResults;
+        pyResults.reserve(results.size());
         
-        for (const auto& [consequent, weight] : results) {
-            pyResults.emplace_back(PyConsequent::fromConsequent(consequent), weight);
+        for (auto& [consequent, weight] : results) {
+            pyResults.emplace_back(PyConsequent::fromConsequent(std::move(consequent)), weight);
+        }
+        
+        return pyResults;
+    }
+    
+    std::vector<std::pair<PyConsequent, float>> inferMultiLayerSemiNaive(const std::vector<PyPattern>& initialFacts, size_t maxLayers) {
+        std::vector<Pattern> cppFacts;
+        cppFacts.reserve(initialFacts.size());
+        for (const auto& fact : initialFacts) {
+            cppFacts.push_back(fact.toPattern());
+        }
+        
+        auto results = engine.inferMultiLayerSemiNaive(cppFacts, maxLayers);
+        std::vector<std::pair<PyConsequent, float>> pyResults;
+        pyResults.reserve(results.size());
+        
+        for (auto& [consequent, weight] : results) {
+            pyResults.emplace_back(PyConsequent::fromConsequent(std::move(consequent)), weight);
         }
         
         return pyResults;
@@ -122,9 +196,10 @@ public:
 };
 
 // Utility functions
-std::vector<PyRule> loadRulesFromJSON(const std::string& filename) {
+std::vector<PyRule> loadRules(const std::string& filename) {
     auto cppRules = ::loadRulesFromJSON(filename);
     std::vector<PyRule> pyRules;
+    pyRules.reserve(cppRules.size());
     
     for (const auto& rule : cppRules) {
         pyRules.push_back(PyRule::fromRule(rule));
@@ -133,17 +208,39 @@ std::vector<PyRule> loadRulesFromJSON(const std::string& filename) {
     return pyRules;
 }
 
-void saveRulesToJSON(const std::vector<PyRule>& rules, const std::string& filename) {
-    std::vector<Rule> cppRules;
-    for (const auto& rule : rules) {
-        cppRules.push_back(rule.toRule());
+void saveRules(const std::vector<PyRule>& rules, const std::string& filename) {
+    ::saveRulesToJSON(toCppRules(rules), filename);
+}
+
+py::bytes dumpsRules(const std::vector<PyRule>& rules) {
+    return py::bytes(::dumpRulesToJSON(toCppRules(rules)));
+}
+
+std::vector<PyRule> loadsRules(const std::string& content) {
+    auto cppRules = ::parseRulesFromJSON(content);
+    std::vector<PyRule> pyRules;
+    pyRules.reserve(cppRules.size());
+    
+    for (const auto& rule : cppRules) {
+        pyRules.push_back(PyRule::fromRule(rule));
     }
     
-    ::saveRulesToJSON(cppRules, filename);
+    return pyRules;
 }
 
-std::vector<float> softmax(const std::vector<float>& scores) {
-    return ::softmax(scores);
+// (id, pattern predicate, pattern args, consequent predicate, consequent args, bias)
+using RuleTuple = std::tuple<int, std::string, std::vector<std::string>, std::string, std::vector<std::string>, float>;
+
+std::vector<PyRule> makeRulesFromTuples(const std::vector<RuleTuple>& tuples) {
+    std::vector<PyRule> pyRules;
+    pyRules.reserve(tuples.size());
+    
+    for (const auto& [id, patternPred, patternArgs, consequentPred, consequentArgs, bias] : tuples) {
+        pyRules.emplace_back(id, PyPattern(patternPred, patternArgs),
+                             PyConsequent(consequentPred, consequentArgs), bias);
+    }
+    
+    return pyRules;
 }
 
 PYBIND11_MODULE(nlformer_python, m) {
@@ -154,6 +251,16 @@ PYBIND11_MODULE(nlformer_python, m) {
         .def(py::init<const std::string&, const std::vector<std::string>&>())
         .def_readwrite("predicate", &PyPattern::predicate)
         .def_readwrite("args", &PyPattern::args)
+        .def(py::self == py::self)
+        // predicate and args stay writable for compatibility; a Pattern used as
+        // a dict or lru_cache key must not be mutated afterwards, since its
+        // hash would change and the entry could no longer be found
+        .def("__hash__", [](const PyPattern& p) {
+            return PatternHash{}(p.predicate, p.args);
+        }, "Hash of predicate and args; do not mutate a Pattern while it is used as a key")
+        .def("__str__", [](const PyPattern& p) {
+            return patternToString(p.predicate, p.args);
+        })
         .def("__repr__", [](const PyPattern& p) {
             std::string result = "Pattern(" + p.predicate + ", [";
             for (size_t i = 0; i < p.args.size(); ++i) {
@@ -169,6 +276,9 @@ PYBIND11_MODULE(nlformer_python, m) {
         .def(py::init<const std::string&, const std::vector<std::string>&>())
         .def_readwrite("predicate", &PyConsequent::predicate)
         .def_readwrite("args", &PyConsequent::args)
+        .def("__str__", [](const PyConsequent& c) {
+            return consequentToString(c.predicate, c.args);
+        })
         .def("__repr__", [](const PyConsequent& c) {
             std::string result = "Consequent(" + c.predicate + ", [";
             for (size_t i = 0; i < c.args.size(); ++i) {
@@ -193,14 +303,28 @@ PYBIND11_MODULE(nlformer_python, m) {
     // Engine class
     py::class_<PyEngine>(m, "Engine")
         .def(py::init<const std::vector<PyRule>&>())
+        // Inference only touches C++ objects, so the GIL is released while it runs.
+        // A const PyPattern& argument aliases the Python object, so infer copies its
+        // query first and releases the GIL itself; list arguments arrive as copies
         .def("infer", &PyEngine::infer, "Perform single pattern inference")
-        .def("infer_context", &PyEngine::inferContext, "Perform context-aware inference")
-        .def("infer_multi_layer", &PyEngine::inferMultiLayer, "Perform multi-layer inference");
+        .def("infer_batch", &PyEngine::inferBatch, py::arg("queries"), py::call_guard<py::gil_scoped_release>(),
+             "Perform single pattern inference on a batch of queries in one call")
+        .def("infer_context", &PyEngine::inferContext, py::call_guard<py::gil_scoped_release>(),
+             "Perform context-aware inference")
+        .def("infer_multi_layer", &PyEngine::inferMultiLayer, py::call_guard<py::gil_scoped_release>(),
+             "Perform multi-layer inference")
+        .def("infer_multi_layer_semi_naive", &PyEngine::inferMultiLayerSemiNaive, py::call_guard<py::gil_scoped_release>(),
+             "Perform multi-layer inference firing rules only on newly derived facts")
+        .def("clear_cache", &PyEngine::clearCache, "Drop memoized inference results");
     
     // Utility functions
-    m.def("load_rules_from_json", &loadRulesFromJSON, "Load rules from JSON file");
-    m.def("save_rules_to_json", &saveRulesToJSON, "Save rules to JSON file");
-    m.def("softmax", &softmax, "Compute softmax attention weights");
+    m.def("load_rules_from_json", &loadRules, "Load rules from JSON file");
+    m.def("save_rules_to_json", &saveRules, "Save rules to JSON file");
+    m.def("dumps_rules", &dumpsRules, "Serialize rules to JSON bytes");
+    m.def("loads_rules", &loadsRules, "Load rules from JSON bytes or str");
+    m.def("make_rules_from_tuples", &makeRulesFromTuples, py::arg("tuples"),
+          "Build rules from (id, pattern_pred, pattern_args, consequent_pred, consequent_args, bias) tuples");
+    m.def("softmax", &softmax, py::call_guard<py::gil_scoped_release>(), "Compute softmax attention weights");
     
     // Version info
     m.attr("__version__") = "1.0.0";
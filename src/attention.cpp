@@ -1,27 +1,53 @@
 #include "attention.hpp"
 #include <algorithm>
-#include <numeric>
 #include <cmath>
+#include <limits>
+#include <utility>
 
 std::vector<float> softmax(const std::vector<float>& scores) {
     if (scores.empty()) {
         return {};
     }
     
-    float maxVal = *std::max_element(scores.begin(), scores.end());
-    std::vector<float> exps;
-    exps.reserve(scores.size());
+    // Online softmax: track the running max and rescale the running sum
+    // whenever it grows, so max and normalizer come out of a single pass.
+    // Each score's exp is taken once, relative to the running max at that
+    // point, and cached in the output. Scores seen under the same running
+    // max form a segment, and the output pass fixes each segment up with a
+    // single exp for the whole segment instead of one per element.
+    const float negInf = -std::numeric_limits<float>::infinity();
+    const size_t n = scores.size();
+    float maxVal = negInf;
+    float sum = 0.0f;
+    std::vector<float> result(n);
+    std::vector<std::pair<size_t, float>> segments;   // (first index, running max)
     
-    for (float score : scores) {
-        exps.push_back(std::exp(score - maxVal));
+    for (size_t j = 0; j < n; ++j) {
+        float score = scores[j];
+        if (score > maxVal) {
+            // While the max is still -inf (leading masked scores) nothing has
+            // been accumulated, and exp(-inf - -inf) would be NaN
+            sum = (maxVal == negInf ? 0.0f : sum * std::exp(maxVal - score)) + 1.0f;
+            maxVal = score;
+            segments.emplace_back(j, score);
+            result[j] = 1.0f;
+        } else if (maxVal != negInf) {
+            float e = std::exp(score - maxVal);
+            sum += e;
+            result[j] = e;
+        } else {
+            result[j] = 0.0f;
+        }
     }
     
-    float sum = std::accumulate(exps.begin(), exps.end(), 0.0f);
-    std::vector<float> result;
-    result.reserve(exps.size());
-    
-    for (float expVal : exps) {
-        result.push_back(expVal / sum);
+    const float invSum = 1.0f / sum;
+    for (size_t s = 0; s < segments.size(); ++s) {
+        size_t begin = segments[s].first;
+        size_t end = s + 1 < segments.size() ? segments[s + 1].first : n;
+        float factor = std::exp(segments[s].second - maxVal) * invSum;
+        for (size_t j = begin; j < end; ++j) {
+            result[j] *= factor;
+        }
     }
     
     return result;
@@ -4,43 +4,299 @@
 #include "types.hpp"
 #include <algorithm>
 #include <unordered_set>
+#include <utility>
 
-Engine::Engine(const std::vector<Rule>& rules) : rules(rules) {}
+namespace {
+
+bool isVariable(const std::string& arg) {
+    return arg.length() > 1 && arg[0] == '?';
+}
+
+// Position of the first pattern argument that is the given variable, or -1
+int32_t firstOccurrence(const std::vector<std::string>& args, const std::string& var) {
+    for (size_t k = 0; k < args.size(); ++k) {
+        if (args[k] == var) {
+            return static_cast<int32_t>(k);
+        }
+    }
+    return -1;
+}
+
+} // namespace
+
+std::size_t Engine::CompiledRules::TermKeyHash::operator()(const std::vector<uint32_t>& key) const {
+    std::size_t h = key.size();
+    for (uint32_t id : key) {
+        h ^= std::hash<uint32_t>{}(id) + 0x9e3779b9 + (h << 6) + (h >> 2);
+    }
+    return h;
+}
+
+uint32_t Engine::CompiledRules::intern(const std::string& term) {
+    auto [it, inserted] = termIds.emplace(term, static_cast<uint32_t>(termIds.size()));
+    return it->second;
+}
+
+uint32_t Engine::CompiledRules::lookup(const std::string& term) const {
+    auto it = termIds.find(term);
+    return it != termIds.end() ? it->second : unknownTerm;
+}
+
+Engine::Engine(const std::vector<Rule>& rules) : rules(rules) {
+    compiled.argOffset.push_back(0);
+    compiled.consOffset.push_back(0);
+    
+    for (size_t i = 0; i < this->rules.size(); ++i) {
+        const Pattern& pattern = this->rules[i].pattern;
+        
+        uint32_t predicateId = compiled.intern(pattern.predicate);
+        if (predicateId >= compiled.rulesByPredicate.size()) {
+            compiled.rulesByPredicate.resize(predicateId + 1);
+        }
+        
+        bool repeatedVariable = false;
+        std::vector<uint32_t> literalPositions;
+        std::vector<uint32_t> literalTerms;
+        for (size_t k = 0; k < pattern.args.size(); ++k) {
+            const std::string& arg = pattern.args[k];
+            if (isVariable(arg)) {
+                int32_t firstSeen = firstOccurrence(pattern.args, arg);
+                repeatedVariable = repeatedVariable || static_cast<size_t>(firstSeen) != k;
+                compiled.argTerm.push_back(CompiledRules::unknownTerm);
+                compiled.argFirstSeen.push_back(firstSeen);
+            } else {
+                uint32_t termId = compiled.intern(arg);
+                literalPositions.push_back(static_cast<uint32_t>(k));
+                literalTerms.push_back(termId);
+                compiled.argTerm.push_back(termId);
+                compiled.argFirstSeen.push_back(-1);
+            }
+        }
+        compiled.argOffset.push_back(static_cast<uint32_t>(compiled.argTerm.size()));
+        
+        auto& predicateRules = compiled.rulesByPredicate[predicateId];
+        if (repeatedVariable) {
+            predicateRules.general.push_back(i);
+        } else {
+            uint32_t arity = static_cast<uint32_t>(pattern.args.size());
+            auto shape = std::find_if(predicateRules.shapes.begin(), predicateRules.shapes.end(),
+                [&](const CompiledRules::RuleShape& s) {
+                    return s.arity == arity && s.literalPositions == literalPositions;
+                });
+            if (shape == predicateRules.shapes.end()) {
+                predicateRules.shapes.push_back({arity, literalPositions, {}});
+                shape = predicateRules.shapes.end() - 1;
+            }
+            shape->rulesByLiterals[literalTerms].push_back(i);
+        }
+        
+        for (const auto& arg : this->rules[i].consequent.args) {
+            compiled.consFromArg.push_back(isVariable(arg) ? firstOccurrence(pattern.args, arg) : -1);
+        }
+        compiled.consOffset.push_back(static_cast<uint32_t>(compiled.consFromArg.size()));
+    }
+}
+
+// The mutex is neither copyable nor movable, so the copy and move
+// operations are spelled out; each side keeps its own mutex
+Engine::Engine(const Engine& other) : rules(other.rules), compiled(other.compiled) {
+    std::lock_guard<std::mutex> lock(other.cacheMutex);
+    inferCache = other.inferCache;
+}
+
+Engine::Engine(Engine&& other) : rules(std::move(other.rules)), compiled(std::move(other.compiled)) {
+    std::lock_guard<std::mutex> lock(other.cacheMutex);
+    inferCache = std::move(other.inferCache);
+}
+
+Engine& Engine::operator=(const Engine& other) {
+    if (this != &other) {
+        rules = other.rules;
+        compiled = other.compiled;
+        std::scoped_lock lock(cacheMutex, other.cacheMutex);
+        inferCache = other.inferCache;
+    }
+    return *this;
+}
+
+Engine& Engine::operator=(Engine&& other) {
+    if (this != &other) {
+        rules = std::move(other.rules);
+        compiled = std::move(other.compiled);
+        std::scoped_lock lock(cacheMutex, other.cacheMutex);
+        inferCache = std::move(other.inferCache);
+    }
+    return *this;
+}
+
+// Indices of the rules whose pattern matches the query, in rule order
+std::vector<size_t> Engine::matchingRules(const Pattern& query, const std::vector<uint32_t>& queryIds) const {
+    std::vector<size_t> matches;
+    uint32_t predicateId = compiled.lookup(query.predicate);
+    if (predicateId >= compiled.rulesByPredicate.size()) {
+        return matches;
+    }
+    const auto& predicateRules = compiled.rulesByPredicate[predicateId];
+    
+    std::vector<uint32_t> key;
+    for (const auto& shape : predicateRules.shapes) {
+        if (shape.arity != queryIds.size()) {
+            continue;
+        }
+        
+        key.clear();
+        for (uint32_t pos : shape.literalPositions) {
+            if (queryIds[pos] == CompiledRules::unknownTerm) {
+                break;   // rule literals are always known terms
+            }
+            key.push_back(queryIds[pos]);
+        }
+        if (key.size() != shape.literalPositions.size()) {
+            continue;
+        }
+        
+        auto it = shape.rulesByLiterals.find(key);
+        if (it != shape.rulesByLiterals.end()) {
+            matches.insert(matches.end(), it->second.begin(), it->second.end());
+        }
+    }
+    
+    for (size_t i : predicateRules.general) {
+        if (matchCompiled(i, query, queryIds)) {
+            matches.push_back(i);
+        }
+    }
+    
+    std::sort(matches.begin(), matches.end());
+    return matches;
+}
+
+std::vector<uint32_t> Engine::queryTermIds(const Pattern& query) const {
+    // Lookup only: terms no rule mentions stay unknownTerm rather than growing the table
+    std::vector<uint32_t> ids;
+    ids.reserve(query.args.size());
+    for (const auto& arg : query.args) {
+        ids.push_back(compiled.lookup(arg));
+    }
+    return ids;
+}
+
+// Same semantics as PatternMatcher::matchScore for a rule whose predicate
+// already matches: literals must be equal, repeated variables must bind to
+// equal terms. A successful match has confidence 1.0.
+bool Engine::matchCompiled(size_t ruleIndex, const Pattern& query, const std::vector<uint32_t>& queryIds) const {
+    uint32_t begin = compiled.argOffset[ruleIndex];
+    uint32_t end = compiled.argOffset[ruleIndex + 1];
+    if (end - begin != queryIds.size()) {
+        return false;
+    }
+    
+    for (uint32_t k = 0; k < end - begin; ++k) {
+        int32_t firstSeen = compiled.argFirstSeen[begin + k];
+        if (firstSeen < 0) {
+            if (queryIds[k] != compiled.argTerm[begin + k]) {
+                return false;
+            }
+        } else if (static_cast<uint32_t>(firstSeen) != k) {
+            uint32_t bound = queryIds[firstSeen];
+            if (queryIds[k] != bound ||
+                (bound == CompiledRules::unknownTerm && query.args[k] != query.args[firstSeen])) {
+                return false;
+            }
+        }
+    }
+    return true;
+}
+
+Consequent Engine::substituteCompiled(size_t ruleIndex, const Pattern& query) const {
+    const Consequent& consequent = rules[ruleIndex].consequent;
+    uint32_t begin = compiled.consOffset[ruleIndex];
+    
+    Consequent result;
+    result.predicate = consequent.predicate;
+    result.args.reserve(consequent.args.size());
+    for (size_t k = 0; k < consequent.args.size(); ++k) {
+        int32_t fromArg = compiled.consFromArg[begin + k];
+        result.args.push_back(fromArg >= 0 ? query.args[fromArg] : consequent.args[k]);
+    }
+    return result;
+}
 
 std::vector<std::pair<Consequent, float>> Engine::infer(const Pattern& query) {
-    std::vector<float> scores;
-    std::vector<std::unordered_map<std::string, std::string>> bindingsList;
+    {
+        std::lock_guard<std::mutex> lock(cacheMutex);
+        auto cached = inferCache.find(query);
+        if (cached != inferCache.end()) {
+            return cached->second;
+        }
+    }
     
+    // Rules with a different predicate can never match, so they keep a zero
+    // match score and only contribute their bias to the softmax
+    std::vector<float> scores;
+    scores.reserve(rules.size());
     for (const auto& rule : rules) {
-        auto [score, bindings] = matchScore(query, rule.pattern);
-        scores.push_back(score + rule.bias);
-        bindingsList.push_back(bindings);
+        scores.push_back(rule.bias);
+    }
+    std::vector<char> matched(rules.size(), 0);
+    
+    for (size_t i : matchingRules(query, queryTermIds(query))) {
+        scores[i] += 1.0f;
+        matched[i] = 1;
     }
     
     std::vector<float> weights = softmax(scores);
     std::vector<std::pair<Consequent, float>> result;
+    result.reserve(rules.size());
     
     for (size_t i = 0; i < rules.size(); ++i) {
-        Consequent subConsequent = substitute(rules[i].consequent, bindingsList[i]);
-        result.emplace_back(subConsequent, weights[i]);
+        if (matched[i]) {
+            result.emplace_back(substituteCompiled(i, query), weights[i]);
+        } else {
+            result.emplace_back(rules[i].consequent, weights[i]);
+        }
     }
     
+    std::lock_guard<std::mutex> lock(cacheMutex);
+    if (inferCache.size() >= maxCacheEntries) {
+        inferCache.clear();
+    }
+    inferCache.emplace(query, result);
+    
     return result;
 }
-std::vector<std::pair<Consequent, float>> Engine::inferContext(const std::vector<Pattern>& facts) {
-    std::vector<std::pair<Consequent, float>> allConsequents;
+void Engine::clearCache() {
+    std::lock_guard<std::mutex> lock(cacheMutex);
+    inferCache.clear();
+}
+std::vector<std::vector<std::pair<Consequent, float>>> Engine::inferBatch(const std::vector<Pattern>& queries) {
+    std::vector<std::vector<std::pair<Consequent, float>>> results;
+    results.reserve(queries.size());
     
-    for (const auto& fact : facts) {
-        auto res = infer(fact);
-        allConsequents.insert(allConsequents.end(), res.begin(), res.end());
+    for (const auto& query : queries) {
+        results.push_back(infer(query));
     }
     
+    return results;
+}
+std::vector<std::pair<Consequent, float>> Engine::inferContext(const std::vector<Pattern>& facts) {
+    // Repeated facts in one context reuse the first inference result; their
+    // weights are still added once per occurrence, in the original order
+    std::unordered_map<Pattern, std::vector<std::pair<Consequent, float>>, PatternHash> factResults;
     std::unordered_map<Consequent, float, ConsequentHash> map;
-    for (const auto& [consequent, weight] : allConsequents) {
-        map[consequent] += weight;
+    
+    for (const auto& fact : facts) {
+        auto it = factResults.find(fact);
+        if (it == factResults.end()) {
+            it = factResults.emplace(fact, infer(fact)).first;
+        }
+        for (const auto& [consequent, weight] : it->second) {
+            map[consequent] += weight;
+        }
     }
     
     std::vector<std::pair<Consequent, float>> result;
+    result.reserve(map.size());
     for (const auto& [consequent, weight] : map) {
         result.emplace_back(consequent, weight);
     }
@@ -52,6 +308,7 @@ std::vector<std::pair<Consequent, float>> Engine::inferMultiLayer(
     size_t maxLayers) {
     
     std::vector<Pattern> knownFacts = initialFacts;
+    std::unordered_set<Pattern, PatternHash> seenFacts(initialFacts.begin(), initialFacts.end());
     std::unordered_map<Consequent, float, ConsequentHash> allConsequents;
     size_t layer = 0;
     
@@ -59,19 +316,14 @@ std::vector<std::pair<Consequent, float>> Engine::inferMultiLayer(
         std::vector<Pattern> newFacts;
         
         for (const auto& fact : knownFacts) {
-            for (const auto& rule : rules) {
-                auto [score, bindings] = matchScore(fact, rule.pattern);
-                if (score > 0.0f) {
-                    Consequent consSub = substitute(rule.consequent, bindings);
-                    allConsequents[consSub] += score + rule.bias;
-                    Pattern newPattern(consSub.predicate, consSub.args);
-                    
-                    bool alreadyKnown = std::find(knownFacts.begin(), knownFacts.end(), newPattern) != knownFacts.end();
-                    bool alreadyNew = std::find(newFacts.begin(), newFacts.end(), newPattern) != newFacts.end();
-                    
-                    if (!alreadyKnown && !alreadyNew) {
-                        newFacts.push_back(newPattern);
-                    }
+            for (size_t i : matchingRules(fact, queryTermIds(fact))) {
+                Consequent consSub = substituteCompiled(i, fact);
+                allConsequents[consSub] += 1.0f + rules[i].bias;
+                Pattern newPattern(consSub.predicate, consSub.args);
+                
+                // seenFacts holds both known and new facts
+                if (seenFacts.insert(newPattern).second) {
+                    newFacts.push_back(newPattern);
                 }
             }
         }
@@ -82,6 +334,52 @@ std::vector<std::pair<Consequent, float>> Engine::inferMultiLayer(
     }
     
     std::vector<std::pair<Consequent, float>> result;
+    result.reserve(allConsequents.size());
+    for (const auto& [consequent, weight] : allConsequents) {
+        result.emplace_back(consequent, weight);
+    }
+    
+    return result;
+}
+std::vector<std::pair<Consequent, float>> Engine::inferMultiLayerSemiNaive(
+    const std::vector<Pattern>& initialFacts,
+    size_t maxLayers) {
+    
+    // Semi-naive evaluation: each layer only fires rules on the facts derived
+    // by the previous layer (the delta), so every (fact, rule) derivation is
+    // made and weighted exactly once instead of being repeated every layer
+    std::unordered_set<Pattern, PatternHash> knownFacts;
+    std::vector<Pattern> delta;
+    for (const auto& fact : initialFacts) {
+        if (knownFacts.insert(fact).second) {
+            delta.push_back(fact);
+        }
+    }
+    
+    std::unordered_map<Consequent, float, ConsequentHash> allConsequents;
+    size_t layer = 0;
+    
+    while (layer < maxLayers && !delta.empty()) {
+        std::vector<Pattern> nextDelta;
+        
+        for (const auto& fact : delta) {
+            for (size_t i : matchingRules(fact, queryTermIds(fact))) {
+                Consequent consSub = substituteCompiled(i, fact);
+                allConsequents[consSub] += 1.0f + rules[i].bias;
+                
+                Pattern newPattern(consSub.predicate, consSub.args);
+                if (knownFacts.insert(newPattern).second) {
+                    nextDelta.push_back(std::move(newPattern));
+                }
+            }
+        }
+        
+        delta = std::move(nextDelta);
+        layer++;
+    }
+    
+    std::vector<std::pair<Consequent, float>> result;
+    result.reserve(allConsequents.size());
     for (const auto& [consequent, weight] : allConsequents) {
         result.emplace_back(consequent, weight);
     }
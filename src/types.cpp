@@ -3,85 +3,100 @@
 #include <fstream>
 #include <sstream>
 #include <iostream>
+#include <iterator>
+#include <stdexcept>
 #include <nlohmann/json.hpp>
 
 using json = nlohmann::json;
 
-// Global function implementations
-std::pair<float, std::unordered_map<std::string, std::string>> matchScore(
-    const Pattern& query, const Pattern& pattern) {
-    return NLFormer::PatternMatcher::matchScore(query, pattern);
+namespace {
+
+std::vector<Rule> rulesFromJSON(const json& j) {
+    if (!j.is_array()) {
+        throw std::runtime_error("JSON file must contain an array of rules");
+    }
+    
+    std::vector<Rule> rules;
+    rules.reserve(j.size());
+    
+    for (const auto& ruleJson : j) {
+        if (!ruleJson.contains("id") || !ruleJson.contains("pattern") || 
+            !ruleJson.contains("consequent") || !ruleJson.contains("bias")) {
+            throw std::runtime_error("Invalid rule format in JSON");
+        }
+        
+        int id = ruleJson["id"];
+        const auto& patternStr = ruleJson["pattern"].get_ref<const std::string&>();
+        const auto& consequentStr = ruleJson["consequent"].get_ref<const std::string&>();
+        float bias = ruleJson["bias"];
+        
+        rules.emplace_back(id, parsePattern(patternStr), parseConsequent(consequentStr), bias);
+    }
+    
+    return rules;
 }
 
-Consequent substitute(const Consequent& consequent, 
-                     const std::unordered_map<std::string, std::string>& bindings) {
-    return NLFormer::SubstitutionEngine::substitute(consequent, bindings);
+json rulesToJSON(const std::vector<Rule>& rules) {
+    json j = json::array();
+    
+    for (const auto& rule : rules) {
+        json ruleJson;
+        ruleJson["id"] = rule.id;
+        ruleJson["pattern"] = patternToString(rule.pattern);
+        ruleJson["consequent"] = consequentToString(rule.consequent);
+        ruleJson["bias"] = rule.bias;
+        
+        j.push_back(std::move(ruleJson));
+    }
+    
+    return j;
 }
 
+} // namespace
+
 std::vector<Rule> loadRulesFromJSON(const std::string& filename) {
-    std::vector<Rule> rules;
-    
     try {
-        std::ifstream file(filename);
+        std::ifstream file(filename, std::ios::binary);
         if (!file.is_open()) {
             throw std::runtime_error("Could not open file: " + filename);
         }
         
-        json j;
-        file >> j;
-        
-        if (!j.is_array()) {
-            throw std::runtime_error("JSON file must contain an array of rules");
-        }
+        // Parsing from a contiguous buffer is much faster than nlohmann's
+        // character-at-a-time stream adapter
+        std::string content((std::istreambuf_iterator<char>(file)),
+                            std::istreambuf_iterator<char>());
         
-        for (const auto& ruleJson : j) {
-            if (!ruleJson.contains("id") || !ruleJson.contains("pattern") || 
-                !ruleJson.contains("consequent") || !ruleJson.contains("bias")) {
-                throw std::runtime_error("Invalid rule format in JSON");
-            }
-            
-            int id = ruleJson["id"];
-            std::string patternStr = ruleJson["pattern"];
-            std::string consequentStr = ruleJson["consequent"];
-            float bias = ruleJson["bias"];
-            
-            // Parse pattern
-            Pattern pattern = parsePattern(patternStr);
-            
-            // Parse consequent
-            Consequent consequent = parseConsequent(consequentStr);
-            
-            rules.emplace_back(id, pattern, consequent, bias);
-        }
+        return parseRulesFromJSON(content);
         
     } catch (const std::exception& e) {
         std::cerr << "Error loading rules from JSON: " << e.what() << std::endl;
         throw;
     }
-    
-    return rules;
+}
+
+std::vector<Rule> parseRulesFromJSON(const std::string& content) {
+    try {
+        return rulesFromJSON(json::parse(content));
+    } catch (const json::exception& e) {
+        // Report malformed or mistyped JSON the same way as other rule format errors
+        throw std::runtime_error(std::string("Invalid JSON: ") + e.what());
+    }
+}
+
+std::string dumpRulesToJSON(const std::vector<Rule>& rules) {
+    return rulesToJSON(rules).dump();
 }
 
 void saveRulesToJSON(const std::vector<Rule>& rules, const std::string& filename) {
     try {
-        json j = json::array();
+        std::string content = rulesToJSON(rules).dump(2);
         
-        for (const auto& rule : rules) {
-            json ruleJson;
-            ruleJson["id"] = rule.id;
-            ruleJson["pattern"] = patternToString(rule.pattern);
-            ruleJson["consequent"] = consequentToString(rule.consequent);
-            ruleJson["bias"] = rule.bias;
-            
-            j.push_back(ruleJson);
-        }
-        
-        std::ofstream file(filename);
+        std::ofstream file(filename, std::ios::binary);
         if (!file.is_open()) {
             throw std::runtime_error("Could not open file for writing: " + filename);
         }
         
-        file << j.dump(2) << std::endl;
+        file << content << '\n';
         
     } catch (const std::exception& e) {
         std::cerr << "Error saving rules to JSON: " << e.what() << std::endl;
@@ -133,21 +148,32 @@ Consequent parseConsequent(const std::string& consequentStr) {
 }
 
 std::string patternToString(const Pattern& pattern) {
-    std::ostringstream oss;
-    oss << "(" << pattern.predicate;
-    for (const auto& arg : pattern.args) {
-        oss << " " << arg;
+    return patternToString(pattern.predicate, pattern.args);
+}
+
+std::string patternToString(const std::string& predicate, const std::vector<std::string>& args) {
+    size_t length = predicate.size() + 2;
+    for (const auto& arg : args) {
+        length += arg.size() + 1;
     }
-    oss << ")";
-    return oss.str();
+    
+    std::string result;
+    result.reserve(length);
+    result += '(';
+    result += predicate;
+    for (const auto& arg : args) {
+        result += ' ';
+        result += arg;
+    }
+    result += ')';
+    return result;
 }
 
 std::string consequentToString(const Consequent& consequent) {
-    std::ostringstream oss;
-    oss << "(" << consequent.predicate;
-    for (const auto& arg : consequent.args) {
-        oss << " " << arg;
-    }
-    oss << ")";
-    return oss.str();
+    return consequentToString(consequent.predicate, consequent.args);
+}
+
+std::string consequentToString(const std::string& predicate, const std::vector<std::string>& args) {
+    // Consequents are written in the same "(predicate arg ...)" form as patterns
+    return patternToString(predicate, args);
 }
@@ -2,6 +2,8 @@
 #include "../include/attention.hpp"
 #include <vector>
 #include <cmath>
+#include <algorithm>
+#include <limits>
 
 class AttentionTest : public ::testing::Test {
 protected:
@@ -145,3 +147,69 @@ TEST_F(AttentionTest, NumericalStability) {
     EXPECT_GT(result[2], result[1]);
     EXPECT_GT(result[1], result[0]);
 }
+
+TEST_F(AttentionTest, MaskedScores) {
+    // -inf is the usual way to mask a position out of the attention
+    const float masked = -std::numeric_limits<float>::infinity();
+    
+    std::vector<std::vector<float>> cases = {
+        {masked, 1.0f, 2.0f},
+        {1.0f, masked, 2.0f},
+        {1.0f, 2.0f, masked}
+    };
+    
+    for (const auto& scores : cases) {
+        auto result = softmax(scores);
+        ASSERT_EQ(result.size(), 3);
+        
+        float sum = 0.0f;
+        for (size_t i = 0; i < scores.size(); ++i) {
+            EXPECT_FALSE(std::isnan(result[i]));
+            if (scores[i] == masked) {
+                EXPECT_EQ(result[i], 0.0f);
+            }
+            sum += result[i];
+        }
+        EXPECT_NEAR(sum, 1.0f, 0.001f);
+    }
+    
+    auto first = softmax(cases[0]);
+    EXPECT_NEAR(first[1], 0.2689f, 0.001f);
+    EXPECT_NEAR(first[2], 0.7311f, 0.001f);
+}
+
+TEST_F(AttentionTest, MatchesReferenceSoftmax) {
+    std::vector<float> scores = {0.5f, -2.0f, 4.0f, 4.0f, 1.25f, -7.5f, 3.0f};
+    auto result = softmax(scores);
+    
+    float maxVal = *std::max_element(scores.begin(), scores.end());
+    float sum = 0.0f;
+    for (float score : scores) {
+        sum += std::exp(score - maxVal);
+    }
+    
+    ASSERT_EQ(result.size(), scores.size());
+    for (size_t i = 0; i < scores.size(); ++i) {
+        EXPECT_NEAR(result[i], std::exp(scores[i] - maxVal) / sum, 1e-6f);
+    }
+}
+
+TEST_F(AttentionTest, LongVectorMatchesReference) {
+    // Unordered scores, so the running max changes several times along the vector
+    std::vector<float> scores;
+    for (int i = 0; i < 37; ++i) {
+        scores.push_back(std::sin(static_cast<float>(i)) * 10.0f);
+    }
+    auto result = softmax(scores);
+    
+    float maxVal = *std::max_element(scores.begin(), scores.end());
+    float sum = 0.0f;
+    for (float score : scores) {
+        sum += std::exp(score - maxVal);
+    }
+    
+    ASSERT_EQ(result.size(), scores.size());
+    for (size_t i = 0; i < scores.size(); ++i) {
+        EXPECT_NEAR(result[i], std::exp(scores[i] - maxVal) / sum, 1e-6f);
+    }
+}
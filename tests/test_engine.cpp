@@ -2,8 +2,11 @@
 #include "../include/engine.hpp"
 #include "../include/types.hpp"
 #include "../include/matcher.hpp"
+#include "../include/attention.hpp"
 #include <vector>
 #include <string>
+#include <thread>
+#include <random>
 
 class EngineTest : public ::testing::Test {
 protected:
@@ -23,6 +26,29 @@ protected:
     std::unique_ptr<Engine> engine;
 };
 
+namespace {
+
+// Single-query inference spelled out with matchScore and substitute, as the
+// engine did before rules were compiled to term IDs
+std::vector<std::pair<Consequent, float>> referenceInfer(const std::vector<Rule>& rules, const Pattern& query) {
+    std::vector<float> scores;
+    std::vector<std::unordered_map<std::string, std::string>> bindingsList;
+    for (const auto& rule : rules) {
+        auto [score, bindings] = matchScore(query, rule.pattern);
+        scores.push_back(score + rule.bias);
+        bindingsList.push_back(bindings);
+    }
+    
+    std::vector<float> weights = softmax(scores);
+    std::vector<std::pair<Consequent, float>> result;
+    for (size_t i = 0; i < rules.size(); ++i) {
+        result.emplace_back(substitute(rules[i].consequent, bindingsList[i]), weights[i]);
+    }
+    return result;
+}
+
+} // namespace
+
 TEST_F(EngineTest, BasicInference) {
     Pattern query("is", {"vehicle", "car"});
     auto results = engine->infer(query);
@@ -171,3 +197,260 @@ TEST_F(EngineTest, LargeRuleSet) {
     }
     EXPECT_TRUE(foundMatch);
 }
+
+TEST_F(EngineTest, BatchInference) {
+    std::vector<Pattern> queries = {
+        Pattern("is", {"vehicle", "car"}),
+        Pattern("can", {"vehicle", "drive"})
+    };
+    
+    auto batchResults = engine->inferBatch(queries);
+    
+    ASSERT_EQ(batchResults.size(), queries.size());
+    for (size_t i = 0; i < queries.size(); ++i) {
+        EXPECT_EQ(batchResults[i], engine->infer(queries[i]));
+    }
+}
+
+TEST_F(EngineTest, CachedInference) {
+    Pattern query("is", {"vehicle", "car"});
+    auto first = engine->infer(query);
+    auto second = engine->infer(query);
+    
+    EXPECT_EQ(first, second);
+    
+    engine->clearCache();
+    EXPECT_EQ(engine->infer(query), first);
+}
+
+TEST_F(EngineTest, CopiedAndMovedEnginesInfer) {
+    Pattern query("is", {"vehicle", "car"});
+    auto expected = engine->infer(query);
+    
+    Engine copied(*engine);
+    EXPECT_EQ(copied.infer(query), expected);
+    
+    Engine moved(std::move(copied));
+    EXPECT_EQ(moved.infer(query), expected);
+    
+    Engine assigned(std::vector<Rule>{});
+    assigned = std::move(moved);
+    EXPECT_EQ(assigned.infer(query), expected);
+}
+
+TEST_F(EngineTest, OtherPredicatesKeepBiasOnlyScores) {
+    Pattern query("can", {"vehicle", "drive"});
+    auto results = engine->infer(query);
+    
+    // Every rule still takes part in the softmax, only rule 4 matches
+    ASSERT_EQ(results.size(), rules.size());
+    EXPECT_EQ(results[3].first, Consequent("needs", {"vehicle", "engine"}));
+    for (size_t i = 0; i < results.size(); ++i) {
+        if (i != 3) {
+            EXPECT_GT(results[3].second, results[i].second);
+        }
+    }
+}
+
+TEST_F(EngineTest, ConcurrentInference) {
+    std::vector<Pattern> queries = {
+        Pattern("is", {"a", "car"}),
+        Pattern("is", {"b", "electricCar"}),
+        Pattern("can", {"c", "drive"}),
+        Pattern("needs", {"d", "engine"})
+    };
+    
+    std::vector<std::vector<std::pair<Consequent, float>>> expected;
+    {
+        Engine reference(rules);
+        for (const auto& query : queries) {
+            expected.push_back(reference.infer(query));
+        }
+    }
+    
+    std::vector<std::thread> threads;
+    std::vector<int> allMatched(4, 1);
+    for (size_t t = 0; t < allMatched.size(); ++t) {
+        threads.emplace_back([&, t]() {
+            for (int i = 0; i < 200; ++i) {
+                for (size_t q = 0; q < queries.size(); ++q) {
+                    if (engine->infer(queries[q]) != expected[q]) {
+                        allMatched[t] = 0;
+                    }
+                }
+            }
+        });
+    }
+    for (auto& thread : threads) {
+        thread.join();
+    }
+    
+    for (int matched : allMatched) {
+        EXPECT_TRUE(matched);
+    }
+}
+
+TEST_F(EngineTest, SemiNaiveMultiLayerInference) {
+    std::vector<Pattern> initialFacts = {
+        Pattern("is", {"vehicle", "car"})
+    };
+    
+    auto naive = engine->inferMultiLayer(initialFacts, 3);
+    auto semiNaive = engine->inferMultiLayerSemiNaive(initialFacts, 3);
+    
+    // Same derived consequents, but each derivation is only counted once
+    ASSERT_EQ(semiNaive.size(), naive.size());
+    for (const auto& [consequent, weight] : semiNaive) {
+        bool found = false;
+        for (const auto& [naiveConsequent, naiveWeight] : naive) {
+            if (naiveConsequent == consequent) {
+                found = true;
+                EXPECT_LE(weight, naiveWeight);
+            }
+        }
+        EXPECT_TRUE(found);
+        EXPECT_FLOAT_EQ(weight, 1.0f);
+    }
+}
+
+TEST_F(EngineTest, ContextInferenceCountsRepeatedFacts) {
+    Pattern fact("is", {"vehicle", "car"});
+    
+    auto once = engine->inferContext({fact});
+    auto twice = engine->inferContext({fact, fact});
+    
+    ASSERT_EQ(once.size(), twice.size());
+    for (const auto& [consequent, weight] : once) {
+        bool found = false;
+        for (const auto& [otherConsequent, otherWeight] : twice) {
+            if (otherConsequent == consequent) {
+                found = true;
+                EXPECT_FLOAT_EQ(otherWeight, 2.0f * weight);
+            }
+        }
+        EXPECT_TRUE(found);
+    }
+}
+
+TEST_F(EngineTest, RepeatedVariableRules) {
+    std::vector<Rule> sameRules = {
+        Rule(1, Pattern("same", {"?x", "?x"}), Consequent("reflexive", {"?x"}), 0.0f),
+        Rule(2, Pattern("same", {"?x", "?y"}), Consequent("pair", {"?x", "?y"}), 0.0f)
+    };
+    Engine sameEngine(sameRules);
+    
+    auto equal = sameEngine.inferMultiLayer({Pattern("same", {"a", "a"})}, 1);
+    auto different = sameEngine.inferMultiLayer({Pattern("same", {"a", "b"})}, 1);
+    
+    EXPECT_EQ(equal.size(), 2u);
+    ASSERT_EQ(different.size(), 1u);
+    EXPECT_EQ(different[0].first, Consequent("pair", {"a", "b"}));
+}
+
+TEST_F(EngineTest, UnknownQueryTermsMatchVariables) {
+    std::vector<Rule> sameRules = {
+        Rule(1, Pattern("same", {"?x", "?x"}), Consequent("reflexive", {"?x"}), 0.0f),
+        Rule(2, Pattern("is", {"?x", "car"}), Consequent("can", {"?x", "drive"}), 0.0f)
+    };
+    Engine sameEngine(sameRules);
+    
+    // None of these query terms appear in any rule
+    std::vector<Pattern> queries = {
+        Pattern("same", {"u", "u"}),
+        Pattern("same", {"u", "v"}),
+        Pattern("is", {"u", "car"}),
+        Pattern("is", {"u", "plane"}),
+        Pattern("unseen", {"u", "car"})
+    };
+    for (const auto& query : queries) {
+        EXPECT_EQ(sameEngine.infer(query), referenceInfer(sameRules, query));
+    }
+    
+    EXPECT_EQ(sameEngine.infer(queries[0])[0].first, Consequent("reflexive", {"u"}));
+    EXPECT_EQ(sameEngine.infer(queries[1])[0].first, Consequent("reflexive", {"?x"}));
+    EXPECT_EQ(sameEngine.infer(queries[2])[1].first, Consequent("can", {"u", "drive"}));
+}
+
+TEST_F(EngineTest, BareQuestionMarkIsLiteral) {
+    std::vector<Rule> markRules = {
+        Rule(1, Pattern("ask", {"?", "?x"}), Consequent("asked", {"?x", "?"}), 0.0f)
+    };
+    Engine markEngine(markRules);
+    
+    // "?" is too short to be a variable, so it only matches itself
+    Pattern matching("ask", {"?", "why"});
+    Pattern other("ask", {"what", "why"});
+    
+    EXPECT_EQ(markEngine.infer(matching), referenceInfer(markRules, matching));
+    EXPECT_EQ(markEngine.infer(other), referenceInfer(markRules, other));
+    EXPECT_EQ(markEngine.infer(matching)[0].first, Consequent("asked", {"why", "?"}));
+    EXPECT_EQ(markEngine.infer(other)[0].first, Consequent("asked", {"?x", "?"}));
+}
+
+TEST_F(EngineTest, ArityMismatchDoesNotMatch) {
+    std::vector<Rule> arityRules = {
+        Rule(1, Pattern("is", {"?x", "car"}), Consequent("can", {"?x", "drive"}), 0.0f),
+        Rule(2, Pattern("same", {"?x", "?x"}), Consequent("reflexive", {"?x"}), 0.0f)
+    };
+    Engine arityEngine(arityRules);
+    
+    std::vector<Pattern> queries = {
+        Pattern("is", {"vehicle"}),
+        Pattern("is", {"vehicle", "car", "car"}),
+        Pattern("is", {}),
+        Pattern("same", {"a"}),
+        Pattern("same", {"a", "a", "a"})
+    };
+    for (const auto& query : queries) {
+        auto results = arityEngine.infer(query);
+        EXPECT_EQ(results, referenceInfer(arityRules, query));
+        EXPECT_EQ(results[0].first, arityRules[0].consequent);
+        EXPECT_EQ(results[1].first, arityRules[1].consequent);
+    }
+}
+
+TEST_F(EngineTest, UnboundConsequentVariableIsKept) {
+    std::vector<Rule> freeRules = {
+        Rule(1, Pattern("parent", {"?x", "?y"}), Consequent("ancestor", {"?x", "?z", "?y"}), 0.0f)
+    };
+    Engine freeEngine(freeRules);
+    
+    Pattern query("parent", {"ann", "bob"});
+    auto results = freeEngine.infer(query);
+    
+    EXPECT_EQ(results, referenceInfer(freeRules, query));
+    EXPECT_EQ(results[0].first, Consequent("ancestor", {"ann", "?z", "bob"}));
+}
+
+TEST_F(EngineTest, RandomQueriesMatchReference) {
+    // Small vocabularies so literals, repeated variables and arity mismatches all come up
+    const std::vector<std::string> predicates = {"p", "q"};
+    const std::vector<std::string> ruleTerms = {"a", "b", "?", "?x", "?y", "?z"};
+    const std::vector<std::string> queryTerms = {"a", "b", "c", "?", "?x"};
+    std::mt19937 rng(42);
+    auto pick = [&rng](const std::vector<std::string>& from) {
+        return from[std::uniform_int_distribution<size_t>(0, from.size() - 1)(rng)];
+    };
+    auto pickArgs = [&rng, &pick](const std::vector<std::string>& from) {
+        std::vector<std::string> args(std::uniform_int_distribution<size_t>(0, 3)(rng));
+        for (auto& arg : args) {
+            arg = pick(from);
+        }
+        return args;
+    };
+    
+    for (int trial = 0; trial < 200; ++trial) {
+        std::vector<Rule> randomRules;
+        for (int id = 0; id < 6; ++id) {
+            randomRules.emplace_back(id, Pattern(pick(predicates), pickArgs(ruleTerms)),
+                                     Consequent(pick(predicates), pickArgs(ruleTerms)),
+                                     static_cast<float>(id % 3));
+        }
+        Engine randomEngine(randomRules);
+        
+        for (int q = 0; q < 20; ++q) {
+            Pattern query(pick(predicates), pickArgs(queryTerms));
+            EXPECT_EQ(randomEngine.infer(query), referenceInfer(randomRules, query));
+        }
+    }
+}
@@ -7,7 +7,7 @@ class TypesTest : public ::testing::Test {
 protected:
     void SetUp() override {
         // Create temporary test JSON file
-        testJsonContent = R"([
+        testJsonContent = R"json([
             {
                 "id": 1,
                 "pattern": "(is ?x car)",
@@ -20,7 +20,7 @@ protected:
                 "consequent": "(needs ?x fuel)",
                 "bias": -5.0
             }
-        ])";
+        ])json";
         
         std::ofstream file("test_rules.json");
         file << testJsonContent;
@@ -41,7 +41,7 @@ TEST_F(TypesTest, PatternEquality) {
     Pattern p3("is", {"vehicle", "airplane"});
     
     EXPECT_EQ(p1, p2);
-    EXPECT_NE(p1, p3);
+    EXPECT_FALSE(p1 == p3);
 }
 
 TEST_F(TypesTest, ConsequentEquality) {
@@ -50,7 +50,7 @@ TEST_F(TypesTest, ConsequentEquality) {
     Consequent c3("can", {"vehicle", "fly"});
     
     EXPECT_EQ(c1, c2);
-    EXPECT_NE(c1, c3);
+    EXPECT_FALSE(c1 == c3);
 }
 
 TEST_F(TypesTest, RuleConstruction) {
@@ -152,10 +152,37 @@ TEST_F(TypesTest, EmptyJSONArray) {
 
 TEST_F(TypesTest, JSONWithMissingFields) {
     std::ofstream file("incomplete.json");
-    file << R"([{"id": 1, "pattern": "(is ?x car)"}])";
+    file << R"json([{"id": 1, "pattern": "(is ?x car)"}])json";
     file.close();
     
     EXPECT_THROW(loadRulesFromJSON("incomplete.json"), std::runtime_error);
     
     std::remove("incomplete.json");
 }
+
+TEST_F(TypesTest, JSONStringRoundTrip) {
+    std::vector<Rule> rules = {
+        Rule(1, Pattern("is", {"?x", "car"}), Consequent("can", {"?x", "drive"}), 0.0f),
+        Rule(2, Pattern("is", {"?x", "electricCar"}), Consequent("needs", {"?x", "fuel"}), -5.0f)
+    };
+    
+    auto loaded = parseRulesFromJSON(dumpRulesToJSON(rules));
+    
+    ASSERT_EQ(loaded.size(), rules.size());
+    for (size_t i = 0; i < rules.size(); ++i) {
+        EXPECT_EQ(loaded[i].id, rules[i].id);
+        EXPECT_EQ(loaded[i].pattern, rules[i].pattern);
+        EXPECT_EQ(loaded[i].consequent, rules[i].consequent);
+        EXPECT_FLOAT_EQ(loaded[i].bias, rules[i].bias);
+    }
+}
+
+TEST_F(TypesTest, PatternToStringFromFields) {
+    Pattern pattern("is", {"vehicle", "car"});
+    Consequent consequent("can", {"vehicle", "drive"});
+    
+    EXPECT_EQ(patternToString(pattern.predicate, pattern.args), "(is vehicle car)");
+    EXPECT_EQ(patternToString(pattern.predicate, pattern.args), patternToString(pattern));
+    EXPECT_EQ(consequentToString(consequent.predicate, consequent.args), consequentToString(consequent));
+    EXPECT_EQ(patternToString("empty", {}), "(empty)");
+}